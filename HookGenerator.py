@@ -1,230 +1,540 @@
 import dash
 from dash import html, Input, Output, State, dcc
 import dash_bootstrap_components as dbc
+from flask import Response, abort, jsonify
 from model_serving_utils import generate_hooks, generate_thumbnails
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+import atexit
+import hashlib
+import json
+import secrets
 import threading
 import time
 
-class HookGenerator:
-    def __init__(self, app, endpoint_name):
-        self.app = app
-        self.endpoint_name = endpoint_name
-        self.generation_status = {}  # Track generation status
-        self.layout = self._create_layout()
-        self._create_callbacks()
-        self._add_custom_css()
+EMPTY_INPUT_MESSAGE = '⚠️ Paste your blog content first'
 
-    def _create_layout(self):
-        return html.Div([
-            html.H1('🎯 Databricks Hook Generator', className='hook-title mb-4'),
-            html.P([
-                'Transform your technical blog into click-magnet titles and promise-driven subtitles. ',
-                'Built for senior data engineers, platform engineers, and data/ML architects.'
-            ], className='hook-subtitle mb-4'),
-            
+# Seconds between keep-alive comments on an open generation event stream
+STREAM_HEARTBEAT_SECONDS = 10
+
+# Delivered when a generation's result was already collected elsewhere or has expired
+EXPIRED_RESULT_MESSAGE = '❌ Error: Result expired, please try again'
+
+# Seconds after which a finished but uncollected generation (e.g. closed tab) is dropped
+GENERATION_TTL_SECONDS = 300
+
+# Number of decoded thumbnail images kept in memory for the /thumb route
+MAX_CACHED_THUMBNAILS = 32
+
+# Waits for a generation to finish by subscribing to its event stream. The server pushes a
+# single message once the Future completes; if the stream cannot be used (e.g. a proxy that
+# buffers event streams) the generation is handed to a scheduler shared by all pending
+# generations, which polls the status route from a single browser timer.
+WAIT_FOR_RESULT_JS = """
+function(gen_id) {
+    if (!gen_id) {
+        return window.dash_clientside.no_update;
+    }
+
+    var scheduler = window.hookgenScheduler;
+    if (!scheduler) {
+        scheduler = window.hookgenScheduler = {pending: {}, timer: null};
+
+        // Generations take 10-30 seconds, so poll slowly at first and faster once done is likely
+        scheduler.nextPoll = function(entry) {
+            var now = Date.now();
+            return now + (now - entry.start < 8000 ? 2000 : 500);
+        };
+
+        scheduler.tick = function() {
+            var ids = Object.keys(scheduler.pending);
+            if (ids.length === 0) {
+                clearInterval(scheduler.timer);
+                scheduler.timer = null;
+                return;
+            }
+            ids.forEach(function(id) {
+                var entry = scheduler.pending[id];
+                if (entry.inFlight || Date.now() < entry.due) {
+                    return;
+                }
+                entry.inFlight = true;
+                fetch('/hookgen/status/' + encodeURIComponent(id))
+                    .then(function(response) { return response.json(); })
+                    .then(function(status) {
+                        if (status.done) {
+                            delete scheduler.pending[id];
+                            entry.resolve(status.result);
+                        }
+                    })
+                    .catch(function() {})
+                    .then(function() {
+                        entry.inFlight = false;
+                        entry.due = scheduler.nextPoll(entry);
+                    });
+            });
+        };
+
+        scheduler.add = function(id, start, resolve) {
+            var entry = {start: start, resolve: resolve, inFlight: false};
+            entry.due = scheduler.nextPoll(entry);
+            scheduler.pending[id] = entry;
+            if (!scheduler.timer) {
+                scheduler.timer = setInterval(scheduler.tick, 500);
+            }
+        };
+    }
+
+    return new Promise(function(resolve) {
+        var start = Date.now();
+        var source = new EventSource('/hookgen/stream/' + encodeURIComponent(gen_id));
+        source.onmessage = function(event) {
+            var status = JSON.parse(event.data);
+            if (status.done) {
+                source.close();
+                resolve(status.result);
+            }
+        };
+        source.onerror = function() {
+            source.close();
+            scheduler.add(gen_id, start, resolve);
+        };
+    });
+}
+"""
+
+# Builds the thumbnail component tree in the browser from the concepts text and the
+# image URLs served by the /thumb route. Returns [children, loading_style, output_style].
+RENDER_THUMBNAILS_JS = """
+function(result) {
+    var no_update = window.dash_clientside.no_update;
+    if (result === null || result === undefined) {
+        return [no_update, no_update, no_update, no_update];
+    }
+    if (typeof result === 'string') {
+        // Failed generations deliver their error message as plain text
+        result = {concepts: result, images: []};
+    }
+
+    function component(type, props) {
+        return {type: type, namespace: 'dash_html_components', props: props};
+    }
+
+    // Add concepts section
+    var children = [component('Div', {children: [
+        component('H6', {
+            children: '📝 Thumbnail Concepts',
+            style: {marginBottom: '10px', fontWeight: 'bold'}
+        }),
+        component('Pre', {
+            children: result.concepts,
+            style: {
+                whiteSpace: 'pre-wrap',
+                fontSize: '13px',
+                backgroundColor: '#f8f9fa',
+                padding: '15px',
+                borderRadius: '5px',
+                marginBottom: '20px'
+            }
+        })
+    ]})];
+
+    // Add generated images if available
+    if (result.images.length > 0) {
+        children.push(component('H6', {
+            children: '🖼️ Generated Images',
+            style: {marginTop: '20px', marginBottom: '15px', fontWeight: 'bold'}
+        }));
+        result.images.forEach(function(image) {
+            children.push(component('Div', {children: [
+                component('P', {
+                    children: 'Thumbnail ' + image.index,
+                    style: {fontWeight: '500', marginBottom: '10px'}
+                }),
+                component('Img', {
+                    src: image.url,
+                    style: {
+                        width: '100%',
+                        maxWidth: '600px',
+                        borderRadius: '8px',
+                        boxShadow: '0 4px 6px rgba(0,0,0,0.1)',
+                        marginBottom: '20px'
+                    }
+                })
+            ]}));
+        });
+    }
+
+    return [children, {display: 'none'}, {display: 'block'}];
+}
+"""
+
+HOOKGEN_CSS_MARKER = '<!--hookgen-css-->'
+
+HOOKGEN_CSS = '''
+@import url('https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;700&display=swap');
+
+body {
+    font-family: 'DM Sans', sans-serif;
+    background: linear-gradient(135deg, #F9F7F4 0%, #EEEDE9 100%);
+    min-height: 100vh;
+}
+
+.hook-container {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 2rem;
+}
+
+.hook-title {
+    font-size: 48px;
+    font-weight: 700;
+    color: #1B3139;
+    text-align: center;
+    margin-bottom: 1rem;
+    text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
+}
+
+.hook-subtitle {
+    font-size: 18px;
+    color: #2D4550;
+    text-align: center;
+    max-width: 800px;
+    margin: 0 auto 2rem auto;
+    line-height: 1.6;
+}
+
+.blog-textarea {
+    font-family: 'DM Sans', monospace;
+    border-radius: 10px;
+    border: 2px solid #DCE0E2;
+    padding: 1rem;
+    resize: vertical;
+}
+
+.blog-textarea:focus {
+    border-color: #FF3621;
+    box-shadow: 0 0 0 0.2rem rgba(255, 54, 33, 0.25);
+}
+
+.card {
+    border: none;
+    border-radius: 15px;
+    box-shadow: 0 8px 16px rgba(0,0,0,0.1);
+}
+
+.card-header {
+    background-color: #1B3139;
+    color: white;
+    border-radius: 15px 15px 0 0 !important;
+    padding: 1rem 1.5rem;
+    font-weight: 600;
+}
+
+.output-card .card-header {
+    background-color: #00A972;
+}
+
+#generate-button {
+    background-color: #FF3621;
+    border-color: #FF3621;
+    font-weight: 600;
+    padding: 0.75rem 2rem;
+    border-radius: 25px;
+    transition: all 0.3s ease;
+}
+
+#generate-button:hover {
+    background-color: #E62E1C;
+    border-color: #E62E1C;
+    transform: translateY(-2px);
+    box-shadow: 0 4px 8px rgba(255, 54, 33, 0.3);
+}
+
+#clear-button {
+    border-radius: 25px;
+    padding: 0.75rem 2rem;
+    font-weight: 600;
+}
+
+#copy-button {
+    color: white;
+    text-decoration: none;
+    font-weight: 600;
+}
+
+#copy-button:hover {
+    color: #EEEDE9;
+    text-decoration: underline;
+}
+
+.output-text {
+    background-color: #F9F7F4;
+    padding: 1.5rem;
+    border-radius: 10px;
+    font-family: 'DM Sans', sans-serif;
+    color: #1B3139;
+    line-height: 1.8;
+    margin: 0;
+    min-height: 200px;
+}
+
+.copy-feedback {
+    position: fixed;
+    top: 20px;
+    right: 20px;
+    background-color: #00A972;
+    color: white;
+    padding: 1rem 1.5rem;
+    border-radius: 10px;
+    box-shadow: 0 4px 12px rgba(0,0,0,0.2);
+    display: none;
+    z-index: 9999;
+    font-weight: 600;
+    animation: slideIn 0.3s ease;
+}
+
+.copy-feedback.error-feedback {
+    background-color: #FF3621;
+}
+
+@keyframes slideIn {
+    from {
+        transform: translateX(100%);
+        opacity: 0;
+    }
+    to {
+        transform: translateX(0);
+        opacity: 1;
+    }
+}
+
+.spinner-border {
+    border-color: #FF3621;
+    border-right-color: transparent;
+}
+
+#loading-container {
+    text-align: center;
+    padding: 3rem;
+}
+
+/* Responsive design */
+@media (max-width: 768px) {
+    .hook-title {
+        font-size: 32px;
+    }
+
+    .hook-subtitle {
+        font-size: 16px;
+    }
+
+    .hook-container {
+        padding: 1rem;
+    }
+}
+'''
+
+@lru_cache(maxsize=1)
+def _build_layout():
+    """Build the hook generator layout. The tree is static, so it is built once and shared."""
+    return html.Div([
+        html.H1('🎯 Databricks Hook Generator', className='hook-title mb-4'),
+        html.P([
+            'Transform your technical blog into click-magnet titles and promise-driven subtitles. ',
+            'Built for senior data engineers, platform engineers, and data/ML architects.'
+        ], className='hook-subtitle mb-4'),
+
+        dbc.Card([
+            dbc.CardHeader([
+                html.H5('📝 Blog Content Input', className='mb-0')
+            ]),
+            dbc.CardBody([
+                dbc.Textarea(
+                    id='blog-input',
+                    placeholder='Paste your blog content here (draft, outline, or final article)...',
+                    className='blog-textarea',
+                    style={'height': '400px', 'fontSize': '14px'}
+                ),
+                html.Div([
+                    dbc.Button(
+                        '✨ Generate Hooks',
+                        id='generate-button',
+                        color='success',
+                        size='lg',
+                        className='me-2 mt-3',
+                        n_clicks=0
+                    ),
+                    dbc.Button(
+                        '🎨 Generate Thumbnails',
+                        id='generate-thumbnail-button',
+                        color='primary',
+                        size='lg',
+                        className='me-2 mt-3',
+                        n_clicks=0
+                    ),
+                    dbc.Button(
+                        '🗑️ Clear',
+                        id='clear-button',
+                        color='secondary',
+                        size='lg',
+                        className='mt-3',
+                        n_clicks=0
+                    ),
+                ], className='d-flex'),
+            ])
+        ], className='mb-4'),
+
+        # Loading indicator
+        html.Div(id='loading-container', children=[
+            dbc.Card([
+                dbc.CardBody([
+                    html.Div([
+                        dbc.Spinner(color='primary', size='lg'),
+                        html.H4('🎨 Generating your hooks...', className='mt-3 text-center'),
+                        html.P('This may take 10-30 seconds', className='text-center text-muted')
+                    ], className='text-center p-4')
+                ])
+            ])
+        ], style={'display': 'none'}),
+
+        # Hooks Output container
+        html.Div(id='output-container', children=[
             dbc.Card([
                 dbc.CardHeader([
-                    html.H5('📝 Blog Content Input', className='mb-0')
+                    html.H5('✨ Generated Hooks', className='mb-0 d-inline'),
+                    dbc.Button(
+                        '📋 Copy All',
+                        id='copy-button',
+                        color='link',
+                        size='sm',
+                        className='float-end'
+                    ),
                 ]),
                 dbc.CardBody([
-                    dbc.Textarea(
-                        id='blog-input',
-                        placeholder='Paste your blog content here (draft, outline, or final article)...',
-                        className='blog-textarea',
-                        style={'height': '400px', 'fontSize': '14px'}
-                    ),
-                    html.Div([
-                        dbc.Button(
-                            '✨ Generate Hooks',
-                            id='generate-button',
-                            color='success',
-                            size='lg',
-                            className='me-2 mt-3',
-                            n_clicks=0
-                        ),
-                        dbc.Button(
-                            '🎨 Generate Thumbnails',
-                            id='generate-thumbnail-button',
-                            color='primary',
-                            size='lg',
-                            className='me-2 mt-3',
-                            n_clicks=0
-                        ),
-                        dbc.Button(
-                            '🗑️ Clear',
-                            id='clear-button',
-                            color='secondary',
-                            size='lg',
-                            className='mt-3',
-                            n_clicks=0
-                        ),
-                    ], className='d-flex'),
+                    html.Pre(
+                        id='output-text',
+                        className='output-text',
+                        style={'whiteSpace': 'pre-wrap', 'fontSize': '14px'}
+                    )
                 ])
-            ], className='mb-4'),
-            
-            # Loading indicator
-            html.Div(id='loading-container', children=[
-                dbc.Card([
-                    dbc.CardBody([
-                        html.Div([
-                            dbc.Spinner(color='primary', size='lg'),
-                            html.H4('🎨 Generating your hooks...', className='mt-3 text-center'),
-                            html.P('This may take 10-30 seconds', className='text-center text-muted')
-                        ], className='text-center p-4')
-                    ])
+            ], className='output-card')
+        ], style={'display': 'none'}),
+
+        # Thumbnails Output container
+        html.Div(id='thumbnail-output-container', children=[
+            dbc.Card([
+                dbc.CardHeader([
+                    html.H5('🎨 Generated Thumbnails', className='mb-0 d-inline'),
+                    dbc.Button(
+                        '📋 Copy Concepts',
+                        id='copy-thumbnail-button',
+                        color='link',
+                        size='sm',
+                        className='float-end'
+                    ),
+                ]),
+                dbc.CardBody([
+                    html.Div(id='thumbnail-output-text')
                 ])
-            ], style={'display': 'none'}),
-            
-            # Hooks Output container
-            html.Div(id='output-container', children=[
-                dbc.Card([
-                    dbc.CardHeader([
-                        html.H5('✨ Generated Hooks', className='mb-0 d-inline'),
-                        dbc.Button(
-                            '📋 Copy All',
-                            id='copy-button',
-                            color='link',
-                            size='sm',
-                            className='float-end'
-                        ),
-                    ]),
-                    dbc.CardBody([
-                        html.Pre(
-                            id='output-text',
-                            className='output-text',
-                            style={'whiteSpace': 'pre-wrap', 'fontSize': '14px'}
-                        )
-                    ])
-                ], className='output-card')
-            ], style={'display': 'none'}),
-            
-            # Thumbnails Output container
-            html.Div(id='thumbnail-output-container', children=[
-                dbc.Card([
-                    dbc.CardHeader([
-                        html.H5('🎨 Generated Thumbnails', className='mb-0 d-inline'),
-                        dbc.Button(
-                            '📋 Copy Concepts',
-                            id='copy-thumbnail-button',
-                            color='link',
-                            size='sm',
-                            className='float-end'
-                        ),
-                    ]),
-                    dbc.CardBody([
-                        html.Div(id='thumbnail-output-text')
-                    ])
-                ], className='output-card')
-            ], style={'display': 'none'}),
-            
-            # Stores for state management
-            dcc.Store(id='output-store'),
-            dcc.Store(id='generation-trigger'),
-            dcc.Store(id='generation-result'),
-            dcc.Store(id='thumbnail-output-store'),
-            dcc.Store(id='thumbnail-generation-trigger'),
-            dcc.Store(id='thumbnail-generation-result'),
-            
-            # Interval for checking generation status
-            dcc.Interval(id='check-interval', interval=500, disabled=True, n_intervals=0),
-            dcc.Interval(id='thumbnail-check-interval', interval=500, disabled=True, n_intervals=0),
-            
-            html.Div(id='copy-feedback', className='copy-feedback'),
-            html.Div(id='dummy-output', style={'display': 'none'})
-        ], className='hook-container p-4')
+            ], className='output-card')
+        ], style={'display': 'none'}),
 
-    def _create_callbacks(self):
-        # Callback 1: Start generation (non-blocking)
-        @self.app.callback(
-            Output('generation-trigger', 'data'),
-            Output('loading-container', 'style'),
-            Output('output-container', 'style', allow_duplicate=True),
-            Output('check-interval', 'disabled'),
-            Output('check-interval', 'n_intervals'),
-            Input('generate-button', 'n_clicks'),
-            State('blog-input', 'value'),
-            prevent_initial_call=True
-        )
-        def start_generation(n_clicks, blog_content):
-            if not blog_content or not blog_content.strip():
-                # Show error in output
-                return (
-                    None,
-                    {'display': 'none'},
-                    {'display': 'block'},
-                    True,
-                    0
-                )
-            
-            if n_clicks > 0:
-                # Generate unique ID for this generation
-                gen_id = f"gen_{n_clicks}_{time.time()}"
-                
-                # Start generation in background thread
-                def generate_in_background():
-                    try:
-                        result = generate_hooks(self.endpoint_name, blog_content)
-                        self.generation_status[gen_id] = {'status': 'complete', 'result': result}
-                    except Exception as e:
-                        self.generation_status[gen_id] = {'status': 'error', 'result': f'❌ Error: {str(e)}'}
-                
-                self.generation_status[gen_id] = {'status': 'generating', 'result': None}
-                thread = threading.Thread(target=generate_in_background, daemon=True)
-                thread.start()
-                
-                # Show loading, hide output, enable interval checking
-                return (
-                    gen_id,
-                    {'display': 'block'},
-                    {'display': 'none'},
-                    False,  # Enable interval
-                    0  # Reset interval counter
-                )
-            
-            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+        # Stores for state management
+        dcc.Store(id='generation-trigger'),
+        dcc.Store(id='generation-result'),
+        dcc.Store(id='generation-source'),  # Digest of the blog last generated from (regenerate detection)
+        dcc.Store(id='thumbnail-generation-trigger'),
+        dcc.Store(id='thumbnail-generation-result'),
+        dcc.Store(id='thumbnail-generation-source'),
+        dcc.Store(id='error-message'),
 
-        # Callback 2: Check generation status periodically
-        @self.app.callback(
-            Output('generation-result', 'data'),
-            Output('check-interval', 'disabled', allow_duplicate=True),
-            Input('check-interval', 'n_intervals'),
-            State('generation-trigger', 'data'),
-            prevent_initial_call=True
+        html.Div(id='copy-feedback', className='copy-feedback'),
+        html.Div(id='dummy-output', style={'display': 'none'})
+    ], className='hook-container p-4')
+
+
+class HookGenerator:
+    def __init__(self, app, endpoint_name, max_workers=8):
+        self.app = app
+        self.endpoint_name = endpoint_name
+        self.generation_status = {}  # Track generations (gen_id -> {'future': Future, 'done_at': finish time})
+        self._thumbnails = OrderedDict()  # Decoded thumbnail PNGs ((image_set_id, index) -> bytes)
+        self._thumbnails_lock = threading.Lock()
+        self._inflight = {}  # Running generations by (worker, blog content, refresh), for request coalescing
+        self._inflight_lock = threading.Lock()
+        # Bounded worker pool shared by all generations; caps concurrent endpoint calls
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hookgen')
+        atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+        self.layout = _build_layout()
+        self._create_routes()
+        self._create_callbacks()
+        self._add_custom_css()
+
+    def _create_routes(self):
+        # Event stream that pushes a single message once the generation finishes
+        @self.app.server.route('/hookgen/stream/<gen_id>')
+        def generation_stream(gen_id):
+            def events():
+                result = EXPIRED_RESULT_MESSAGE
+                entry = self.generation_status.get(gen_id)
+                if entry is not None:
+                    while not wait([entry['future']], timeout=STREAM_HEARTBEAT_SECONDS).done:
+                        yield ': keep-alive\n\n'
+                    # Only the consumer that removes the entry delivers the result
+                    if self.generation_status.pop(gen_id, None) is entry:
+                        result = self._future_result(entry['future'])
+                yield f"data: {json.dumps({'done': True, 'result': result})}\n\n"
+
+            return Response(
+                events(),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        # Status endpoint polled by the client when the event stream is unavailable
+        @self.app.server.route('/hookgen/status/<gen_id>')
+        def generation_status(gen_id):
+            entry = self.generation_status.get(gen_id)
+            if entry is not None and not entry['future'].done():
+                return jsonify(done=False, result=None)
+            if entry is None or self.generation_status.pop(gen_id, None) is not entry:
+                return jsonify(done=True, result=EXPIRED_RESULT_MESSAGE)
+            return jsonify(done=True, result=self._future_result(entry['future']))
+
+        # Decoded thumbnail images referenced by the rendered thumbnail results
+        @self.app.server.route('/thumb/<image_set_id>/<int:index>.png')
+        def thumbnail_image(image_set_id, index):
+            with self._thumbnails_lock:
+                png = self._thumbnails.get((image_set_id, index))
+            if png is None:
+                abort(404)
+            return Response(png, mimetype='image/png', headers={'Cache-Control': 'max-age=3600'})
+
+    def _create_callbacks(self):
+        # Callbacks 1-2: Start hook generation (non-blocking) and wait for its result
+        self._register_generation(
+            'generate-button', 'generation-trigger', 'generation-result', 'generation-source',
+            'output-container', generate_hooks, 'gen'
         )
-        def check_generation_status(n_intervals, gen_id):
-            if not gen_id or gen_id not in self.generation_status:
-                return None, True
-            
-            status_info = self.generation_status[gen_id]
-            
-            if status_info['status'] in ['complete', 'error']:
-                # Generation is done, disable interval and return result
-                result = status_info['result']
-                # Clean up
-                del self.generation_status[gen_id]
-                return result, True
-            
-            # Still generating, keep checking
-            return None, False
 
         # Callback 3: Display results when ready
         @self.app.callback(
             Output('output-text', 'children'),
             Output('loading-container', 'style', allow_duplicate=True),
             Output('output-container', 'style', allow_duplicate=True),
-            Output('output-store', 'data'),
             Input('generation-result', 'data'),
             prevent_initial_call=True
         )
         def display_results(result):
             if result is None:
-                return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+                return dash.no_update, dash.no_update, dash.no_update
             
             return (
                 result,
                 {'display': 'none'},  # Hide loading
-                {'display': 'block'},  # Show output
-                result
+                {'display': 'block'}  # Show output
             )
 
         # Callback 4: Clear button
@@ -261,152 +571,49 @@ class HookGenerator:
             """,
             Output('dummy-output', 'children'),
             Input('copy-button', 'n_clicks'),
-            State('output-store', 'data'),
+            State('generation-result', 'data'),
             prevent_initial_call=True
         )
 
-        # ========== THUMBNAIL GENERATION CALLBACKS ==========
-        
-        # Callback 5: Start thumbnail generation (non-blocking)
-        @self.app.callback(
-            Output('thumbnail-generation-trigger', 'data'),
-            Output('loading-container', 'style', allow_duplicate=True),
-            Output('thumbnail-output-container', 'style', allow_duplicate=True),
-            Output('thumbnail-check-interval', 'disabled'),
-            Output('thumbnail-check-interval', 'n_intervals'),
-            Input('generate-thumbnail-button', 'n_clicks'),
-            State('blog-input', 'value'),
+        # Client-side callback for showing error messages as a toast
+        self.app.clientside_callback(
+            """
+            function(message) {
+                var feedback = document.getElementById('copy-feedback');
+                if (message && feedback) {
+                    feedback.textContent = message;
+                    feedback.classList.add('error-feedback');
+                    feedback.style.display = 'block';
+                    setTimeout(function() {
+                        feedback.style.display = 'none';
+                        feedback.classList.remove('error-feedback');
+                    }, 2000);
+                }
+                return '';
+            }
+            """,
+            Output('dummy-output', 'children', allow_duplicate=True),
+            Input('error-message', 'data'),
             prevent_initial_call=True
         )
-        def start_thumbnail_generation(n_clicks, blog_content):
-            if not blog_content or not blog_content.strip():
-                return (
-                    None,
-                    {'display': 'none'},
-                    {'display': 'block'},
-                    True,
-                    0
-                )
-            
-            if n_clicks > 0:
-                gen_id = f"thumb_{n_clicks}_{time.time()}"
-                
-                def generate_in_background():
-                    try:
-                        result = generate_thumbnails(self.endpoint_name, blog_content)
-                        self.generation_status[gen_id] = {'status': 'complete', 'result': result}
-                    except Exception as e:
-                        self.generation_status[gen_id] = {'status': 'error', 'result': f'❌ Error: {str(e)}'}
-                
-                self.generation_status[gen_id] = {'status': 'generating', 'result': None}
-                thread = threading.Thread(target=generate_in_background, daemon=True)
-                thread.start()
-                
-                return (
-                    gen_id,
-                    {'display': 'block'},
-                    {'display': 'none'},
-                    False,  # Enable interval
-                    0
-                )
-            
-            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
 
-        # Callback 6: Check thumbnail generation status periodically
-        @self.app.callback(
-            Output('thumbnail-generation-result', 'data'),
-            Output('thumbnail-check-interval', 'disabled', allow_duplicate=True),
-            Input('thumbnail-check-interval', 'n_intervals'),
-            State('thumbnail-generation-trigger', 'data'),
-            prevent_initial_call=True
+        # ========== THUMBNAIL GENERATION CALLBACKS ==========
+        
+        # Callbacks 5-6: Start thumbnail generation (non-blocking) and wait for its result
+        self._register_generation(
+            'generate-thumbnail-button', 'thumbnail-generation-trigger', 'thumbnail-generation-result',
+            'thumbnail-generation-source', 'thumbnail-output-container', self._generate_thumbnails, 'thumb'
         )
-        def check_thumbnail_generation_status(n_intervals, gen_id):
-            if not gen_id or gen_id not in self.generation_status:
-                return None, True
-            
-            status_info = self.generation_status[gen_id]
-            
-            if status_info['status'] in ['complete', 'error']:
-                result = status_info['result']
-                del self.generation_status[gen_id]
-                return result, True
-            
-            return None, False
 
-        # Callback 7: Display thumbnail results with images
-        @self.app.callback(
+        # Callback 7: Display thumbnail results with images (client-side)
+        self.app.clientside_callback(
+            RENDER_THUMBNAILS_JS,
             Output('thumbnail-output-text', 'children'),
             Output('loading-container', 'style', allow_duplicate=True),
             Output('thumbnail-output-container', 'style', allow_duplicate=True),
-            Output('thumbnail-output-store', 'data'),
             Input('thumbnail-generation-result', 'data'),
             prevent_initial_call=True
         )
-        def display_thumbnail_results(result):
-            if result is None:
-                return dash.no_update, dash.no_update, dash.no_update, dash.no_update
-            
-            # Parse result to extract concepts and images
-            import re
-            
-            # Split between concepts and images
-            parts = result.split("🎨 GENERATED IMAGES")
-            concepts_text = parts[0] if len(parts) > 0 else result
-            images_section = parts[1] if len(parts) > 1 else ""
-            
-            # Extract full base64 images
-            image_matches = re.findall(r'Image \d+:\n\[BASE64_IMAGE_DATA\]\n(.+?)\n\[END_IMAGE_DATA\]', result, re.DOTALL)
-            
-            # Build output
-            output_children = []
-            
-            # Add concepts section
-            output_children.append(html.Div([
-                html.H6("📝 Thumbnail Concepts", style={'marginBottom': '10px', 'fontWeight': 'bold'}),
-                html.Pre(concepts_text.strip(), style={
-                    'whiteSpace': 'pre-wrap', 
-                    'fontSize': '13px',
-                    'backgroundColor': '#f8f9fa',
-                    'padding': '15px',
-                    'borderRadius': '5px',
-                    'marginBottom': '20px'
-                })
-            ]))
-            
-            # Add generated images if available
-            if image_matches:
-                output_children.append(html.H6("🖼️ Generated Images", style={
-                    'marginTop': '20px',
-                    'marginBottom': '15px',
-                    'fontWeight': 'bold'
-                }))
-                
-                for idx, img_b64 in enumerate(image_matches, 1):
-                    img_b64_clean = img_b64.strip()
-                    if img_b64_clean:
-                        output_children.append(html.Div([
-                            html.P(f"Thumbnail {idx}", style={'fontWeight': '500', 'marginBottom': '10px'}),
-                            html.Img(
-                                src=f"data:image/png;base64,{img_b64_clean}",
-                                style={
-                                    'width': '100%',
-                                    'maxWidth': '600px',
-                                    'borderRadius': '8px',
-                                    'boxShadow': '0 4px 6px rgba(0,0,0,0.1)',
-                                    'marginBottom': '20px'
-                                }
-                            )
-                        ]))
-            
-            # Store only the concepts text for copying
-            store_data = concepts_text.strip()
-            
-            return (
-                output_children,
-                {'display': 'none'},  # Hide loading
-                {'display': 'block'},  # Show output
-                store_data
-            )
 
         # Callback 8: Update clear button to also clear thumbnails
         @self.app.callback(
@@ -423,7 +630,9 @@ class HookGenerator:
         # Client-side callback for copy thumbnail functionality
         self.app.clientside_callback(
             """
-            function(n_clicks, output_data) {
+            function(n_clicks, result) {
+                // Copy only the concepts text; failed generations hold a plain error string
+                var output_data = (result && typeof result === 'object') ? result.concepts : result;
                 if (n_clicks > 0 && output_data) {
                     navigator.clipboard.writeText(output_data).then(function() {
                         var feedback = document.getElementById('copy-feedback');
@@ -441,172 +650,116 @@ class HookGenerator:
             """,
             Output('dummy-output', 'children', allow_duplicate=True),
             Input('copy-thumbnail-button', 'n_clicks'),
-            State('thumbnail-output-store', 'data'),
+            State('thumbnail-generation-result', 'data'),
             prevent_initial_call=True
         )
 
-    def _add_custom_css(self):
-        custom_css = '''
-        @import url('https://fonts.googleapis.com/css2?family=DM+Sans:wght@400;500;700&display=swap');
-        
-        body {
-            font-family: 'DM Sans', sans-serif;
-            background: linear-gradient(135deg, #F9F7F4 0%, #EEEDE9 100%);
-            min-height: 100vh;
-        }
-        
-        .hook-container {
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 2rem;
-        }
-        
-        .hook-title {
-            font-size: 48px;
-            font-weight: 700;
-            color: #1B3139;
-            text-align: center;
-            margin-bottom: 1rem;
-            text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-        }
-        
-        .hook-subtitle {
-            font-size: 18px;
-            color: #2D4550;
-            text-align: center;
-            max-width: 800px;
-            margin: 0 auto 2rem auto;
-            line-height: 1.6;
-        }
-        
-        .blog-textarea {
-            font-family: 'DM Sans', monospace;
-            border-radius: 10px;
-            border: 2px solid #DCE0E2;
-            padding: 1rem;
-            resize: vertical;
-        }
-        
-        .blog-textarea:focus {
-            border-color: #FF3621;
-            box-shadow: 0 0 0 0.2rem rgba(255, 54, 33, 0.25);
-        }
-        
-        .card {
-            border: none;
-            border-radius: 15px;
-            box-shadow: 0 8px 16px rgba(0,0,0,0.1);
-        }
-        
-        .card-header {
-            background-color: #1B3139;
-            color: white;
-            border-radius: 15px 15px 0 0 !important;
-            padding: 1rem 1.5rem;
-            font-weight: 600;
-        }
-        
-        .output-card .card-header {
-            background-color: #00A972;
-        }
-        
-        #generate-button {
-            background-color: #FF3621;
-            border-color: #FF3621;
-            font-weight: 600;
-            padding: 0.75rem 2rem;
-            border-radius: 25px;
-            transition: all 0.3s ease;
-        }
-        
-        #generate-button:hover {
-            background-color: #E62E1C;
-            border-color: #E62E1C;
-            transform: translateY(-2px);
-            box-shadow: 0 4px 8px rgba(255, 54, 33, 0.3);
-        }
-        
-        #clear-button {
-            border-radius: 25px;
-            padding: 0.75rem 2rem;
-            font-weight: 600;
-        }
-        
-        #copy-button {
-            color: white;
-            text-decoration: none;
-            font-weight: 600;
-        }
-        
-        #copy-button:hover {
-            color: #EEEDE9;
-            text-decoration: underline;
-        }
-        
-        .output-text {
-            background-color: #F9F7F4;
-            padding: 1.5rem;
-            border-radius: 10px;
-            font-family: 'DM Sans', sans-serif;
-            color: #1B3139;
-            line-height: 1.8;
-            margin: 0;
-            min-height: 200px;
-        }
-        
-        .copy-feedback {
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background-color: #00A972;
-            color: white;
-            padding: 1rem 1.5rem;
-            border-radius: 10px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.2);
-            display: none;
-            z-index: 9999;
-            font-weight: 600;
-            animation: slideIn 0.3s ease;
-        }
-        
-        @keyframes slideIn {
-            from {
-                transform: translateX(100%);
-                opacity: 0;
-            }
-            to {
-                transform: translateX(0);
-                opacity: 1;
-            }
-        }
-        
-        .spinner-border {
-            border-color: #FF3621;
-            border-right-color: transparent;
-        }
-        
-        #loading-container {
-            text-align: center;
-            padding: 3rem;
-        }
-        
-        /* Responsive design */
-        @media (max-width: 768px) {
-            .hook-title {
-                font-size: 32px;
-            }
+    def _register_generation(self, button_id, trigger_id, result_id, source_id, output_container_id,
+                             worker, prefix):
+        """Register the start and wait callbacks for one kind of generation."""
+        @self.app.callback(
+            Output(trigger_id, 'data'),
+            Output('loading-container', 'style', allow_duplicate=True),
+            Output(output_container_id, 'style', allow_duplicate=True),
+            Output('error-message', 'data', allow_duplicate=True),
+            Output(source_id, 'data'),
+            Input(button_id, 'n_clicks'),
+            State('blog-input', 'value'),
+            State(source_id, 'data'),
+            prevent_initial_call=True
+        )
+        def start_generation(n_clicks, blog_content, last_source):
+            if not blog_content or not blog_content.strip():
+                # Leave the page untouched and only show an error toast
+                return dash.no_update, dash.no_update, dash.no_update, EMPTY_INPUT_MESSAGE, dash.no_update
             
-            .hook-subtitle {
-                font-size: 16px;
-            }
+            if n_clicks > 0:
+                # Generate unique, unguessable ID for this generation (it appears in status URLs)
+                gen_id = f"{prefix}_{secrets.token_hex(8)}"
+                
+                # Clicking again on the same blog asks for fresh variants instead of the cached ones
+                source = hashlib.blake2b(blog_content.encode(), digest_size=16).hexdigest()
+                refresh = source == last_source
+                
+                # Start generation on the worker pool
+                self._track_generation(gen_id, self._submit_once(worker, blog_content, refresh))
+                
+                # Show loading, hide output; the client waits on the result stream
+                return (
+                    gen_id,
+                    {'display': 'block'},
+                    {'display': 'none'},
+                    dash.no_update,
+                    source
+                )
             
-            .hook-container {
-                padding: 1rem;
-            }
-        }
-        '''
-        
-        self.app.index_string = self.app.index_string.replace(
-            '</head>',
-            f'<style>{custom_css}</style></head>'
+            return dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
+        # Wait for the generation result (client-side, pushed by the server)
+        self.app.clientside_callback(
+            WAIT_FOR_RESULT_JS,
+            Output(result_id, 'data'),
+            Input(trigger_id, 'data'),
+            prevent_initial_call=True
         )
+
+    def _submit_once(self, worker, blog_content, refresh=False):
+        """Submit a generation, attaching to an identical one that is still running."""
+        key = (worker, blog_content, refresh)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(worker, self.endpoint_name, blog_content, refresh)
+                self._inflight[key] = future
+                future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return future
+
+    def _track_generation(self, gen_id, future):
+        """Register a generation, dropping finished ones that were never collected."""
+        cutoff = time.monotonic() - GENERATION_TTL_SECONDS
+        for stale_id, entry in list(self.generation_status.items()):
+            # Expire relative to completion, so a long-queued generation is not dropped as it finishes
+            done_at = entry['done_at']
+            if done_at is not None and done_at < cutoff:
+                self.generation_status.pop(stale_id, None)
+        entry = {'future': future, 'done_at': None}
+
+        def mark_done(_):
+            entry['done_at'] = time.monotonic()
+
+        self.generation_status[gen_id] = entry
+        future.add_done_callback(mark_done)
+
+    @staticmethod
+    def _future_result(future):
+        """Return the result of a finished generation, or its error message."""
+        try:
+            return future.result()
+        except Exception as e:
+            return f'❌ Error: {str(e)}'
+
+    def _generate_thumbnails(self, endpoint_name, blog_content, refresh=False):
+        """Thumbnail worker: generate thumbnails and put their images into the /thumb cache.
+
+        Runs on the worker pool so the image bytes never reach the request threads; the
+        returned payload only holds the concepts text and the image URLs.
+        """
+        concepts_text, pngs = generate_thumbnails(endpoint_name, blog_content, refresh)
+        image_set_id = secrets.token_hex(8)
+        images = []
+        for idx, png in enumerate(pngs, 1):
+            if png:  # Failed images are empty and simply not shown
+                with self._thumbnails_lock:
+                    self._thumbnails[(image_set_id, idx)] = png
+                    while len(self._thumbnails) > MAX_CACHED_THUMBNAILS:
+                        self._thumbnails.popitem(last=False)
+                images.append({'index': idx, 'url': f'/thumb/{image_set_id}/{idx}.png'})
+        return {'concepts': concepts_text.strip(), 'images': images}
+
+    def _add_custom_css(self):
+        # Inject the stylesheet once, even if several components share the app
+        if HOOKGEN_CSS_MARKER not in self.app.index_string:
+            self.app.index_string = self.app.index_string.replace(
+                '</head>',
+                f'{HOOKGEN_CSS_MARKER}<style>{HOOKGEN_CSS}</style></head>'
+            )
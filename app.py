@@ -1,9 +1,16 @@
+import logging
 import os
 import dash
 import dash_bootstrap_components as dbc
 from dash import html
 from HookGenerator import HookGenerator
-from model_serving_utils import is_endpoint_supported
+from model_serving_utils import init, is_endpoint_supported
+
+# Show generation progress (INFO) by default; LOG_LEVEL=WARNING quiets it
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
 
 # Ensure environment variable is set correctly
 serving_endpoint = os.getenv('SERVING_ENDPOINT')
@@ -48,6 +55,9 @@ if not endpoint_supported:
         ])
     ], fluid=True)
 else:
+    # Validate the endpoint once up front so generation requests skip the check
+    init(serving_endpoint)
+    
     # Create the hook generator component
     hook_generator = HookGenerator(app=app, endpoint_name=serving_endpoint)
     
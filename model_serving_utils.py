@@ -1,12 +1,251 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+import httpx
+import requests
 from mlflow.deployments import get_deploy_client
 from databricks.sdk import WorkspaceClient
+from tenacity import (
+    AsyncRetrying, before_sleep_log, retry, retry_if_exception, retry_if_exception_type,
+    stop_after_attempt, wait_exponential_jitter,
+)
+
+logger = logging.getLogger(__name__)
+
+# Endpoint task types rarely change; lookup failures are remembered briefly to avoid hammering the API
+TASK_TYPE_TTL_SECONDS = 3600
+TASK_TYPE_ERROR_TTL_SECONDS = 60
+_task_type_cache: dict[str, tuple] = {}  # endpoint name -> (expires_at, task_type, error)
+_VALIDATED: set[str] = set()  # endpoints already checked by init() or a first query
+
+# Output budgets: 5 titles + 5 subtitles, or 2 thumbnail concepts, are well under 1k tokens, but
+# reasoning models (e.g. Gemini 2.5 Pro) spend part of max_tokens on thinking, so leave headroom.
+# Reserving far more than needed shrinks how many requests the endpoint can batch together.
+HOOKS_MAX_TOKENS = int(os.getenv("HOOKS_MAX_TOKENS", "4096"))
+THUMBNAILS_MAX_TOKENS = int(os.getenv("THUMBNAILS_MAX_TOKENS", "4096"))
+
+# Keep-alive connections held per host by the async HTTP client, sized for concurrent users
+HTTP_POOL_SIZE = 20
+
+# Chat requests allowed in flight at once per process, so concurrent users queue here instead of
+# tripping the endpoint's rate limit (429). Sync and async callers each get this many slots.
+CHAT_ENDPOINT_MAX_CONCURRENCY = int(os.getenv("CHAT_ENDPOINT_MAX_CONCURRENCY", "8"))
+_chat_slots = threading.BoundedSemaphore(CHAT_ENDPOINT_MAX_CONCURRENCY)
+
+# Responses worth retrying: rate limiting and transient server errors
+_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Replies to identical requests are served from memory; see clear_cache()
+RESPONSE_CACHE_SIZE = 128
+_response_cache: OrderedDict = OrderedDict()  # (endpoint, messages digest, max_tokens) -> message
+_response_cache_lock = threading.Lock()
+
+# Thumbnail concepts (alone or with hooks) are requested as JSON; the regex only parses replies from
+# endpoints that ignore response_format and answer in the numbered plain-text layout instead
+_JSON_RESPONSE_FORMAT = {"type": "json_object"}
+_IMAGE_DESCRIPTION_RE = re.compile(r'IMAGE_DESCRIPTION:\s*(.+?)(?=\n\n|\n\d+\.|$)', re.DOTALL)
+_CODE_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+# Every request starts with the same system prompt followed by the blog, and only then the task,
+# so hooks, thumbnails, and repeat requests for one blog share a byte-identical prompt prefix that
+# serving backends with automatic prefix caching can reuse instead of prefilling the blog again.
+_SYSTEM_PROMPT = """You create content hooks and thumbnail concepts for technical blogs about Spark, Databricks, Delta Lake, DBSQL, streaming, data engineering, warehousing, LLM-ops, and AI data workflows.
+
+The user message starts with BLOG_CONTENT, your only source of truth, followed by the TASK to perform on it. Follow the task's output format exactly."""
+
+# Each task's guidance ("brief") is kept apart from its output contract so the combined
+# hooks-and-thumbnails request can reuse both briefs under a single JSON contract
+_THUMBNAIL_BRIEF = """You are a top 1% YouTube thumbnail concept director for technical content on Spark, Databricks, Delta Lake, DBSQL, streaming, data engineering, warehousing, LLM-ops, and AI data workflows.
+
+BLOG_CONTENT (above) is your only source of truth. Find its core theme, main pain, and key transformation, then create exactly 2 meaningfully different thumbnail concepts (different angle on the problem/conflict/transformation).
+
+Principles:
+- Story: one clear story per thumbnail; prefer "before vs after" or "chaos vs control"; pain and win obvious at a glance.
+- Emotion: strong (frustration, panic, shock, relief, "finally this works"); any characters are data engineers/architects reacting; no generic stock-photo vibes.
+- Composition: 1–2 main objects, big shapes, simple slightly blurred background, high contrast (problem in reds/oranges, solution in blues/greens), no noisy dashboards.
+- Data metaphors: exploding/melting graphs, clogged pipelines, red error markers, warning triangles vs clean bright pipelines and stable charts; tech hints (generic clusters, code, charts), not full UIs.
+- Style: modern, cinematic; no real-world logos or copyrighted brand assets.
+- Intriguing and slightly clickbait-y, but no fake promises: grounded in BLOG_CONTENT's actual claims.
+
+Field rules:
+- thumbnail_text: 2–4 words, bold and phone-readable, emotion first and tech second (e.g. "Skew Hell", "Shuffle Tax", "DBU Drain", "Cache Is Lying"); complements the image, does not repeat the blog title.
+- image_description: 2–3 sentences covering layout, characters, emotion, colors, key objects, and the story; detailed enough to use directly as an image generation prompt."""
+
+_THUMBNAIL_PROMPT = _THUMBNAIL_BRIEF + """
+
+Respond with only this JSON object, nothing else:
+{"concepts": [{"thumbnail_text": "...", "image_description": "..."}, {"thumbnail_text": "...", "image_description": "..."}]}"""
+
+_HOOKS_BRIEF = """You are the world's best content hook strategist for Spark, Databricks, Delta Lake, DBSQL, streaming, data engineering, warehousing, LLM-ops, and AI data workflows, writing like the top 1% creators (Karpathy, Two Minute Papers, Seattle Data Guy, Andreas Kretz, Dustin Vannoy, Benn Stancil, Chip Huyen).
+
+BLOG_CONTENT (above) is the ONLY source of truth. Infer its core pain, transformation, target reader, and key technologies. Audience: senior data engineers, platform engineers, and data/ML architects.
+
+Write 5 titles and 5 subtitles; subtitle n pairs with title n.
+
+Titles (attention + emotion + curiosity + tension; sell the transformation, never lie, dramatize real pain):
+- 55–75 characters; improve on, never copy, the blog's existing title.
+- Each uses at least one pattern: pain/fear ("Stop Doing This in Spark"), aspiration ("Cut ETL Cost by 70%"), conflict ("Spark vs Flink: Brutal Truth"), revelation ("One Setting That Changes Spark"), insider secret ("The Databricks Pattern Nobody Uses"), numbers ("We Reduced P99 by 43%"), process ("3-Step Medallion Migration Plan").
+- Use real technical nouns from BLOG_CONTENT (Spark, Delta Lake, Auto Loader, DBSQL, DLT, UC, Photon, RAG, ...); read as a field-tested insight for practitioners, not vague clickbait.
+- Vary the angles: at least 1 cost/efficiency, 1 performance/latency, 1 reliability/operability/governance; the other 2 distinct.
+
+Subtitles (value + clarity + credibility + deliverables), 1–2 concise sentences each:
+- State what the reader will learn or achieve, with strong verbs and outcomes (reduce, harden, debug, scale, automate, observe, govern, de-risk).
+- Name specific technologies or concepts from BLOG_CONTENT (e.g. Structured Streaming, Unity Catalog, Z-Order vs Liquid Clustering, AQE, watermarks, p95/p99, DBUs, CI/CD, vector search) and concrete value (lower latency, fewer failures, fewer DBUs, faster debugging, safer governance).
+- Mention artifacts if BLOG_CONTENT has them (notebooks, diagrams, checklists, templates, repos, dashboards). No empty buzzwords; a credible promise, not hype.
+
+Example pair (style only, not content):
+- Title: Stop Letting Skewed Joins Burn Your DBUs: Fix Spark AQE Right
+- Subtitle: Diagnose skew in the Spark UI and tune AQE skew-join settings to cut shuffle spill and p99 job time, with a ready-to-run notebook.
+
+Accuracy: stay plausible for real-world Spark/Databricks. Do NOT invent specific metrics or claims unless BLOG_CONTENT clearly implies them; realistic generalizations ("cut ETL costs", "reduce p99 latency") are fine."""
+
+_HOOKS_PROMPT = _HOOKS_BRIEF + """
+
+Respond in exactly this structure, with nothing before or after (no commentary, no code fences):
+
+💥 Titles
+1.
+2.
+3.
+4.
+5.
+
+🎯 Subtitles
+1.
+2.
+3.
+4.
+5."""
+
+_HOOKS_AND_THUMBNAILS_PROMPT = """Complete both briefs below for the same BLOG_CONTENT.
+
+=== HOOKS BRIEF ===
+""" + _HOOKS_BRIEF + """
+
+=== THUMBNAILS BRIEF ===
+""" + _THUMBNAIL_BRIEF + """
+
+Respond with only this JSON object, nothing else (exactly 5 titles, 5 subtitles, and 2 concepts):
+{"hooks": {"titles": ["...", "..."], "subtitles": ["...", "..."]}, "concepts": [{"thumbnail_text": "...", "image_description": "..."}, {"thumbnail_text": "...", "image_description": "..."}]}"""
+
+@lru_cache(maxsize=1)
+def _workspace_client() -> WorkspaceClient:
+    """Return a shared WorkspaceClient, so auth is resolved once per process."""
+    return WorkspaceClient()
+
+@lru_cache(maxsize=1)
+def _deploy_client():
+    """Return a shared Databricks deployment client, reusing its HTTP session."""
+    return get_deploy_client('databricks')
+
+# Async clients and semaphores bind to the event loop they are used on, so each running loop
+# (e.g. every asyncio.run() call) gets its own; entries go away with their loop. Call
+# aclose_async_client() before a loop ends to close its connections cleanly; otherwise they are
+# only released when the abandoned client is garbage-collected.
+_async_http_clients: WeakKeyDictionary = WeakKeyDictionary()
+_async_chat_semaphores: WeakKeyDictionary = WeakKeyDictionary()
+
+def _async_http_client() -> httpx.AsyncClient:
+    """Return the running loop's shared async HTTP client (HTTP/2, keep-alive) for the async query path."""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        client = _async_http_clients[loop] = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=HTTP_POOL_SIZE),
+        )
+    return client
+
+async def aclose_async_client() -> None:
+    """Close the running loop's async HTTP client, if the async helpers created one."""
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def _async_chat_slots() -> asyncio.Semaphore:
+    """Return the running loop's semaphore bounding concurrent async chat requests."""
+    loop = asyncio.get_running_loop()
+    slots = _async_chat_semaphores.get(loop)
+    if slots is None:
+        slots = _async_chat_semaphores[loop] = asyncio.Semaphore(CHAT_ENDPOINT_MAX_CONCURRENCY)
+    return slots
+
+def _response_cache_key(endpoint_name: str, messages: list[dict[str, str]], max_tokens,
+                        response_format=None) -> tuple:
+    """Key a chat request by endpoint, a digest of its messages (and response format), and budget."""
+    payload = json.dumps([messages, response_format], sort_keys=True).encode()
+    return (endpoint_name, hashlib.blake2b(payload, digest_size=16).digest(), max_tokens)
+
+def _cached_response(key: tuple):
+    """Return a copy of the cached reply for a request key, or None."""
+    with _response_cache_lock:
+        message = _response_cache.get(key)
+        if message is None:
+            return None
+        _response_cache.move_to_end(key)
+    return dict(message)
+
+def _cache_response(key: tuple, message: dict[str, str], finish_reason="stop") -> None:
+    """Remember a reply, evicting the least recently used ones beyond RESPONSE_CACHE_SIZE.
+
+    Empty or truncated replies (finish_reason other than "stop") are skipped, so retrying the
+    same request queries the endpoint again instead of replaying the bad reply.
+    """
+    if not message.get("content") or finish_reason != "stop":
+        return
+    with _response_cache_lock:
+        _response_cache[key] = dict(message)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+def clear_cache() -> None:
+    """Forget all cached endpoint replies, so the next identical request queries the endpoint."""
+    with _response_cache_lock:
+        _response_cache.clear()
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Whether a failed async chat request should be retried."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRYABLE_STATUS_CODES
+    return isinstance(exc, httpx.TransportError)
 
 def _get_endpoint_task_type(endpoint_name: str) -> str:
-    """Get the task type of a serving endpoint."""
-    w = WorkspaceClient()
-    ep = w.serving_endpoints.get(endpoint_name)
+    """Get the task type of a serving endpoint, cached for TASK_TYPE_TTL_SECONDS."""
+    now = time.monotonic()
+    cached = _task_type_cache.get(endpoint_name)
+    if cached is not None and cached[0] > now:
+        _, task_type, error = cached
+        if error is not None:
+            raise error
+        return task_type
+
+    try:
+        w = _workspace_client()
+        ep = w.serving_endpoints.get(endpoint_name)
+    except Exception as e:
+        _task_type_cache[endpoint_name] = (now + TASK_TYPE_ERROR_TTL_SECONDS, None, e)
+        raise
+    _task_type_cache[endpoint_name] = (now + TASK_TYPE_TTL_SECONDS, ep.task, None)
     return ep.task
 
+def clear_task_type_cache() -> None:
+    """Forget cached endpoint task types, e.g. after reconfiguring an endpoint."""
+    _task_type_cache.clear()
+    _VALIDATED.clear()
+
 def is_endpoint_supported(endpoint_name: str) -> bool:
     """Check if the endpoint has a supported task type."""
     task_type = _get_endpoint_task_type(endpoint_name)
@@ -23,297 +262,342 @@ def _validate_endpoint_task_type(endpoint_name: str) -> None:
             f"see https://docs.databricks.com/aws/en/generative-ai/agent-framework/chat-app"
         )
 
-def _query_endpoint(endpoint_name: str, messages: list[dict[str, str]], max_tokens) -> list[dict[str, str]]:
-    """Calls a model serving endpoint."""
+def init(endpoint_name: str) -> None:
+    """Validate the endpoint once at startup so queries against it skip the per-request check."""
     _validate_endpoint_task_type(endpoint_name)
-    
-    res = get_deploy_client('databricks').predict(
-        endpoint=endpoint_name,
-        inputs={'messages': messages, "max_tokens": max_tokens},
-    )
-    if "messages" in res:
-        return res["messages"]
-    elif "choices" in res:
-        choice_message = res["choices"][0]["message"]
+    _VALIDATED.add(endpoint_name)
+
+def _init_async(endpoint_name: str) -> None:
+    """Blocking setup for the async path: validate the endpoint and create the workspace client."""
+    init(endpoint_name)
+    _workspace_client()
+
+def _ensure_validated(endpoint_name: str) -> None:
+    """Validate an endpoint the first time it is queried, unless init() already did."""
+    if endpoint_name not in _VALIDATED:
+        init(endpoint_name)
+
+def _finish_reason(res: dict):
+    """Return why a chat response ended; agent responses carry none and count as complete."""
+    choices = res.get("choices")
+    return choices[0].get("finish_reason") if choices else "stop"
+
+def _extract_message(res: dict) -> dict[str, str]:
+    """Normalize a chat or agent endpoint response into its final message."""
+    # Chat completions responses are the common case, so look for them first
+    choices = res.get("choices")
+    if choices is not None:
+        choice_message = choices[0]["message"]
         choice_content = choice_message.get("content")
         
-        # Case 1: The content is a list of structured objects
-        if isinstance(choice_content, list):
-            combined_content = "".join([part.get("text", "") for part in choice_content if part.get("type") == "text"])
+        # Case 1: The content is a simple string
+        if isinstance(choice_content, str):
+            return choice_message
+        
+        # Case 2: The content is a list of structured objects
+        elif isinstance(choice_content, list):
+            if len(choice_content) == 1 and choice_content[0].get("type") == "text":
+                # Fast path: a single text part needs no joining
+                combined_content = choice_content[0].get("text", "")
+            else:
+                combined_content = "".join(part.get("text", "") for part in choice_content if part.get("type") == "text")
             reformatted_message = {
                 "role": choice_message.get("role"),
                 "content": combined_content
             }
-            return [reformatted_message]
-        
-        # Case 2: The content is a simple string
-        elif isinstance(choice_content, str):
-            return [choice_message]
+            return reformatted_message
+    else:
+        messages = res.get("messages")
+        if messages is not None:
+            return messages[-1]
     raise Exception("This app can only run against:"
                     "1) Databricks foundation model or external model endpoints with the chat task type (described in https://docs.databricks.com/aws/en/machine-learning/model-serving/score-foundation-models#chat-completion-model-query)"
                     "2) Databricks agent serving endpoints that implement the conversational agent schema documented "
                     "in https://docs.databricks.com/aws/en/generative-ai/agent-framework/author-agent")
 
-def query_endpoint(endpoint_name, messages, max_tokens):
-    return _query_endpoint(endpoint_name, messages, max_tokens)[-1]
-
-def _generate_image(prompt: str) -> str:
-    """Generate image using Shutterstock ImageAI endpoint and return base64 encoded image."""
-    try:
-        client = get_deploy_client('databricks')
-        response = client.predict(
-            endpoint="databricks-shutterstock-imageai",
-            inputs={"prompt": prompt}
+def _chat_inputs(messages: list[dict[str, str]], max_tokens, response_format=None) -> dict:
+    """Build the request body for a chat endpoint invocation."""
+    inputs = {'messages': messages, "max_tokens": max_tokens}
+    if response_format is not None:
+        inputs["response_format"] = response_format
+    return inputs
+
+def _supported_response_format(endpoint_name: str, response_format):
+    """Drop response_format for agent endpoints, whose request schema has no such field."""
+    if response_format is not None and _get_endpoint_task_type(endpoint_name) != "llm/v1/chat":
+        return None
+    return response_format
+
+def _query_endpoint(endpoint_name: str, messages: list[dict[str, str]], max_tokens,
+                    response_format=None, use_cache: bool = False, refresh: bool = False) -> dict[str, str]:
+    """Calls a model serving endpoint.
+
+    use_cache serves and stores replies in the response cache; refresh skips the lookup (so the
+    endpoint is queried for a fresh reply) but still stores the new reply.
+    """
+    key = None
+    if use_cache:
+        key = _response_cache_key(endpoint_name, messages, max_tokens, response_format)
+        cached = None if refresh else _cached_response(key)
+        if cached is not None:
+            return cached
+    _ensure_validated(endpoint_name)
+    response_format = _supported_response_format(endpoint_name, response_format)
+    
+    with _chat_slots:
+        res = _deploy_client().predict(
+            endpoint=endpoint_name,
+            inputs=_chat_inputs(messages, max_tokens, response_format),
         )
-        
-        # Extract base64 image from response
-        if isinstance(response, dict) and 'data' in response:
-            images = response['data']
-            if images and len(images) > 0:
-                return images[0].get('b64_json', '')
-        return ""
-    except Exception as e:
-        print(f"Image generation error: {str(e)}")
-        return ""
-
-def generate_thumbnails(endpoint_name: str, blog_content: str) -> str:
-    """Generate YouTube thumbnail concepts AND images from blog content."""
+    message = _extract_message(res)
+    if key is not None:
+        _cache_response(key, message, _finish_reason(res))
+    return message
+
+async def _aquery_endpoint(endpoint_name: str, messages: list[dict[str, str]], max_tokens,
+                           response_format=None, use_cache: bool = False,
+                           refresh: bool = False) -> dict[str, str]:
+    """Async variant of _query_endpoint() that calls the serving REST API directly."""
+    key = None
+    if use_cache:
+        key = _response_cache_key(endpoint_name, messages, max_tokens, response_format)
+        cached = None if refresh else _cached_response(key)
+        if cached is not None:
+            return cached
+    if endpoint_name not in _VALIDATED:
+        # Validation and the first workspace client (auth resolution) block, so keep them off the loop
+        await asyncio.to_thread(_init_async, endpoint_name)
+    if response_format is not None:
+        response_format = await asyncio.to_thread(_supported_response_format, endpoint_name, response_format)
     
-    system_prompt = """You are a top 1% YouTube thumbnail and image concept director for highly technical content about Spark, Databricks, Delta Lake, DBSQL, streaming, data engineering, warehousing, LLM-ops, and AI-powered data workflows.
-
-You will be given:
-- BLOG_CONTENT: the full blog draft or final article (this is your only source of truth)
-
-Your job:
-1. Read BLOG_CONTENT.
-2. Understand its core theme, main pain, and key transformation.
-3. Generate 2 distinct thumbnail concepts tailored to this blog.
+    config = _workspace_client().config
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(5),
+        wait=wait_exponential_jitter(),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True,
+    ):
+        with attempt:
+            # Refreshing an OAuth token can hit the network, so authenticate in a worker thread
+            headers = await asyncio.to_thread(config.authenticate)
+            # Only hold a slot while the request is in flight, not while backing off
+            async with _async_chat_slots():
+                response = await _async_http_client().post(
+                    f"{config.host}/serving-endpoints/{endpoint_name}/invocations",
+                    headers=headers,
+                    json=_chat_inputs(messages, max_tokens, response_format),
+                )
+            response.raise_for_status()
+    res = response.json()
+    message = _extract_message(res)
+    if key is not None:
+        _cache_response(key, message, _finish_reason(res))
+    return message
 
-Each concept must be:
-- Intriguing and slightly clickbait-y (but grounded in the real content).
-- Emotionally strong and visually clear.
-- Directly related to the actual ideas and claims in BLOG_CONTENT (no fake promises).
-
-━━━━━━━━━━━━━━
-TOP 1% THUMBNAIL PRINCIPLES
-━━━━━━━━━━━━━━
-
-Story & Focus
-- One clear story per thumbnail.
-- Prefer "before vs after" or "chaos vs control" narratives.
-- Make the pain and the win visually obvious at a glance.
-
-Emotion & Characters
-- Strong emotions: frustration, panic, shock, relief, "finally this works".
-- If you use characters, they are data engineers/architects reacting to the problem or solution.
-- Avoid generic stock-photo vibes; make it feel specific to data work.
+def query_endpoint(endpoint_name, messages, max_tokens):
+    return _query_endpoint(endpoint_name, messages, max_tokens)
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.5, max=8),
+    # The MLflow client already retries 429/5xx responses before raising requests.HTTPError, and
+    # other HTTP errors (400/401/403/404, e.g. a content-policy rejection) are permanent, so only
+    # connection failures and timeouts are retried here
+    retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout, TimeoutError)),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+def _request_image(prompt: str) -> str:
+    """Call the Shutterstock ImageAI endpoint once (retried on transient errors)."""
+    response = _deploy_client().predict(
+        endpoint="databricks-shutterstock-imageai",
+        inputs={"prompt": prompt}
+    )
+    
+    # Extract base64 image from response
+    if isinstance(response, dict) and 'data' in response:
+        images = response['data']
+        if images and len(images) > 0:
+            return images[0].get('b64_json', '')
+    return ""
 
-Simplicity & Contrast
-- Simple composition: 1–2 main objects, big shapes, big text.
-- High contrast (problem side: reds/oranges; solution side: blues/greens).
-- No noisy dashboards; zoom in on 1–2 key visual elements.
+def _generate_image(prompt: str) -> str:
+    """Generate image using Shutterstock ImageAI endpoint and return base64 encoded image.
 
-Text on Image
-- 2–4 words max.
-- Emotion first, tech second (e.g., "Skew Hell", "Shuffle Tax", "DBU Drain", "Cold Cache", "Zombie Streams", "Cache Is Lying").
-- Large, bold, readable on a phone screen.
-- Text complements the image rather than repeating the blog title.
+    Returns "" only once the retries are exhausted or the error is not transient.
+    """
+    try:
+        return _request_image(prompt)
+    except Exception:
+        logger.exception("Image generation error")
+        return ""
 
-Visual Language for Data/Infra
-- Use metaphors for data problems:
-  - Exploding/melting graphs, clogged pipelines, red error markers, warning triangles.
-  - Clean, bright pipelines and stable charts for the solution.
-- Use tech hints, not full UIs (generic clusters, code snippets, charts).
+def _task_messages(blog_content: str, task_prompt: str) -> list[dict[str, str]]:
+    """Build the chat messages for a task, with the blog ahead of the task-specific instructions."""
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": f"BLOG_CONTENT:\n\n{blog_content}\n\n=== TASK ===\n\n{task_prompt}"}
+    ]
 
-Style
-- Modern, cinematic, high contrast.
-- Background simple and slightly blurred.
-- No real-world logos or copyrighted brand assets; use generic UI elements.
+def _thumbnail_messages(blog_content: str) -> list[dict[str, str]]:
+    """Build the chat messages asking for thumbnail concepts."""
+    return _task_messages(blog_content, _THUMBNAIL_PROMPT)
 
-━━━━━━━━━━━━━━
-OUTPUT FORMAT (STRICT)
-━━━━━━━━━━━━━━
+def _load_json_reply(content: str):
+    """Parse a JSON reply, tolerating a surrounding markdown code fence."""
+    return json.loads(_CODE_FENCE_RE.sub("", content.strip()))
 
-Using BLOG_CONTENT as your source of truth, generate exactly 2 thumbnail concepts.
+def _parse_thumbnail_concepts(content: str) -> tuple[str, list[str]]:
+    """Turn the endpoint's thumbnail reply into display text and the image descriptions."""
+    try:
+        return _render_thumbnail_concepts(_load_json_reply(content)["concepts"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        # Not JSON, or JSON off the schema (e.g. concepts that are not objects): parse it as text
+        return content, [desc.strip() for desc in _IMAGE_DESCRIPTION_RE.findall(content)]
+
+def _render_thumbnail_concepts(concepts: list[dict[str, str]]) -> tuple[str, list[str]]:
+    """Render structured concepts in the numbered display layout and collect their descriptions."""
+    concepts_text = "\n\n".join(
+        f"{idx}.\nTHUMBNAIL_TEXT: {concept.get('thumbnail_text', '')}\n"
+        f"IMAGE_DESCRIPTION: {concept.get('image_description', '')}"
+        for idx, concept in enumerate(concepts, 1)
+    )
+    descriptions = [concept.get("image_description", "").strip() for concept in concepts]
+    return concepts_text, [desc for desc in descriptions if desc]
 
-Respond in this exact structure:
+def _generate_concept_images(content: str) -> tuple[str, list[bytes]]:
+    """Generate an image for each concept's description; returns the concepts text and the images."""
+    # Step 2: Parse the concepts to extract the image descriptions
+    concepts_text, descriptions = _parse_thumbnail_concepts(content)
 
-1.
-THUMBNAIL_TEXT: <2–4 word text that appears on the image>
-IMAGE_DESCRIPTION: <2–3 sentences describing the visual: layout, characters, emotion, colors, key objects, and the story it tells>
+    # Step 3: Generate images for each description concurrently
+    return concepts_text, _generate_images(descriptions)
 
-2.
-THUMBNAIL_TEXT: <2–4 word text that appears on the image>
-IMAGE_DESCRIPTION: <2–3 sentences describing the visual: layout, characters, emotion, colors, key objects, and the story it tells>
+def _generate_images(descriptions: list[str]) -> list[bytes]:
+    """Generate the thumbnail images concurrently; a failed image stays in place as empty bytes."""
+    descriptions = descriptions[:2]  # Limit to 2 thumbnails
+    for idx, desc_clean in enumerate(descriptions, 1):
+        logger.info("Generating image %d for: %.100s...", idx, desc_clean)
 
-Rules:
-- THUMBNAIL_TEXT must be intriguing and slightly clickbait-y, but still truthful to BLOG_CONTENT.
-- IMAGE_DESCRIPTION must be detailed enough to use directly as a prompt for an image generation model.
-- The 2 concepts must be meaningfully different (different angle on the problem/conflict/transformation).
+    with ThreadPoolExecutor(max_workers=2) as image_pool:
+        images_b64 = list(image_pool.map(_generate_image, descriptions))
 
-Do NOT include anything else besides the two numbered concepts in this exact format."""
+    # Decode once here, so callers get bytes they can serve directly
+    return [_decode_image(image_b64) for image_b64 in images_b64]
 
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"BLOG_CONTENT:\n\n{blog_content}"}
-    ]
-    
-    max_tokens = 65536
+def _decode_image(image_b64: str) -> bytes:
+    """Decode one base64 image; a malformed payload counts as a failed image (empty bytes)."""
+    try:
+        return base64.b64decode(image_b64)
+    except (binascii.Error, ValueError):
+        logger.exception("Image decoding error")
+        return b""
+
+def generate_thumbnails(endpoint_name: str, blog_content: str, refresh: bool = False) -> tuple[str, list[bytes]]:
+    """Generate YouTube thumbnail concepts AND images from blog content.
+
+    Returns the concepts text and one PNG per concept; an image that failed to generate is b"".
+    Concept replies are cached per blog; refresh=True asks the endpoint for new concepts.
+    """
+    messages = _thumbnail_messages(blog_content)
+    max_tokens = THUMBNAILS_MAX_TOKENS
     
     try:
         # Step 1: Generate thumbnail concepts
-        response = _query_endpoint(endpoint_name, messages, max_tokens)[-1]
+        response = _query_endpoint(
+            endpoint_name, messages, max_tokens, response_format=_JSON_RESPONSE_FORMAT,
+            use_cache=True, refresh=refresh
+        )
         concepts_text = response.get("content", "Error: No content in response")
         
-        # Step 2: Parse the concepts to extract IMAGE_DESCRIPTION fields
-        import re
-        descriptions = re.findall(r'IMAGE_DESCRIPTION:\s*(.+?)(?=\n\n|\n\d+\.|$)', concepts_text, re.DOTALL)
-        
-        # Step 3: Generate images for each description
-        result_parts = [concepts_text, "\n\n" + "="*50 + "\n🎨 GENERATED IMAGES\n" + "="*50 + "\n\n"]
-        
-        for idx, desc in enumerate(descriptions[:2], 1):  # Limit to 2 thumbnails
-            desc_clean = desc.strip()
-            print(f"Generating image {idx} for: {desc_clean[:100]}...")
-            
-            image_b64 = _generate_image(desc_clean)
-            
-            if image_b64:
-                # Store full base64 data (no truncation)
-                result_parts.append(f"Image {idx}:\n[BASE64_IMAGE_DATA]\n{image_b64}\n[END_IMAGE_DATA]\n\n")
-            else:
-                result_parts.append(f"Image {idx}: ❌ Failed to generate\n\n")
-        
-        return "".join(result_parts)
+        # Steps 2-3: Generate the images
+        return _generate_concept_images(concepts_text)
         
     except Exception as e:
-        raise Exception(f"Failed to generate thumbnails: {str(e)}")
+        raise Exception(f"Failed to generate thumbnails: {e}") from e
 
-def generate_hooks(endpoint_name: str, blog_content: str) -> str:
-    """Generate content hooks from blog content using the configured endpoint."""
+async def generate_thumbnails_async(endpoint_name: str, blog_content: str,
+                                    refresh: bool = False) -> tuple[str, list[bytes]]:
+    """Async variant of generate_thumbnails(); image generation runs in a worker thread."""
+    messages = _thumbnail_messages(blog_content)
+    max_tokens = THUMBNAILS_MAX_TOKENS
     
-    system_prompt = """You are the world's best content hook strategist for Spark, Databricks, Delta Lake, DBSQL, streaming, data engineering, warehousing, LLM-ops, and AI-powered data workflows.
-
-Your goal: turn a single technical blog into hooks that perform like the top 1% creators (Karpathy, Two Minute Papers, Seattle Data Guy, Andreas Kretz, Dustin Vannoy, Benn Stancil, Chip Huyen).
-
-================================
-INPUT
-================================
-
-You will receive:
-- BLOG_CONTENT: the full blog draft, outline, or final article (plain text)
-
-Rules:
-- Treat BLOG_CONTENT as the ONLY source of truth.
-- Infer the core pain, transformation, target reader, and key technologies.
-- Do NOT copy the existing blog title. Improve it.
-
-Audience to assume: senior data engineers, platform engineers, and data/ML architects.
-
-================================
-TASK
-================================
-
-From BLOG_CONTENT, generate:
-- 5 click-magnet titles
-- 5 promise-driven subtitles
-
-Each title n must logically pair with subtitle n (1↔1, 2↔2, etc.).
+    try:
+        response = await _aquery_endpoint(
+            endpoint_name, messages, max_tokens, response_format=_JSON_RESPONSE_FORMAT,
+            use_cache=True, refresh=refresh
+        )
+        concepts_text = response.get("content", "Error: No content in response")
+        return await asyncio.to_thread(_generate_concept_images, concepts_text)
+    except Exception as e:
+        raise Exception(f"Failed to generate thumbnails: {e}") from e
 
-================================
-OUTPUT FORMAT (STRICT)
-================================
+def _hooks_messages(blog_content: str) -> list[dict[str, str]]:
+    """Build the chat messages asking for titles and subtitles."""
+    return _task_messages(blog_content, _HOOKS_PROMPT)
 
-Respond in this exact structure, with nothing before or after:
+def generate_hooks(endpoint_name: str, blog_content: str, refresh: bool = False) -> str:
+    """Generate content hooks from blog content using the configured endpoint.
 
-💥 Titles
-1.
-2.
-3.
-4.
-5.
-
-🎯 Subtitles
-1.
-2.
-3.
-4.
-5.
-
-No commentary. No extra sections. No markdown code fences. No explanations.
-
-================================
-TITLE RULES
-================================
-
-Golden philosophy:
-- Titles = attention + emotion + curiosity + tension
-- Sell the transformation → deliver the truth.
-- Never lie. Always dramatize real pain.
-
-Every title must:
-- Be **55–75 characters** (aim to stay inside this band).
-- Contain at least ONE of these patterns:
-  - Pain / Fear: "Stop Doing This in Spark"
-  - Aspiration: "Cut ETL Cost by 70%"
-  - Conflict: "Spark vs Flink: Brutal Truth"
-  - Revelation: "One Setting That Changes Spark"
-  - Insider Secret: "The Databricks Pattern Nobody Uses"
-  - Numbers / Metrics: "We Reduced P99 by 43%"
-  - Process Transparency: "3-Step Medallion Migration Plan"
-- Use real technical nouns from BLOG_CONTENT (Spark, Delta Lake, Auto Loader, DBSQL, DLT, UC, Photon, RAG, etc.).
-- Target experienced practitioners, not beginners.
-- Feel like a field-tested insight, not vague clickbait.
-
-Diversity requirement:
-- The 5 titles must NOT all use the same angle.
-  - At least 1 primarily cost/efficiency themed.
-  - At least 1 primarily performance/latency themed.
-  - At least 1 primarily reliability/operability/governance themed.
-  - Remaining 2 can mix any angles, but must still be distinct.
-
-================================
-SUBTITLE RULES
-================================
-
-Golden philosophy:
-- Subtitles = value + clarity + credibility + deliverables.
-
-Each subtitle must:
-- Clearly state what the reader will learn or achieve.
-- Use strong verbs + outcomes (reduce, harden, debug, scale, automate, observe, govern, de-risk).
-- Name specific technologies, features, or concepts from BLOG_CONTENT where possible:
-  - e.g., Auto Loader, Structured Streaming, Delta Live Tables, Unity Catalog, DBSQL, Photon, Z-Order vs Liquid Clustering, AQE, broadcast joins, watermarks, checkpoints, p95/p99, DBUs, CI/CD, observability, RAG, vector search.
-- Mention concrete value (e.g., lower latency, fewer failures, reduced DBUs, easier debugging, safer governance, faster incident resolution, better developer velocity).
-- Reference any artifacts if present in BLOG_CONTENT (notebooks, diagrams, checklists, templates, GitHub repos, dashboards).
-
-Style:
-- 1–2 concise sentences.
-- No empty buzzwords. Concrete > vague.
-- Must read as a credible promise, not hype.
-
-================================
-TECHNICAL ACCURACY
-================================
-
-- Stay strictly plausible based on BLOG_CONTENT.
-- Do NOT invent specific metrics or claims (like "cut cost by 90%") unless they are clearly implied.
-- You may generalize ("cut ETL costs", "reduce p99 latency", "stabilize streams") but keep it realistic for real-world Spark/Databricks usage.
-
-Remember:
-- Use ONLY the specified output format.
-- No preamble, no wrap-up, no extra text."""
-
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"BLOG_CONTENT:\n\n{blog_content}"}
-    ]
+    Replies are cached per blog; refresh=True asks the endpoint for new variants.
+    """
+    messages = _hooks_messages(blog_content)
+    max_tokens = HOOKS_MAX_TOKENS
     
-    # Use a higher max_tokens to accommodate full response
-    max_tokens = 65536
+    try:
+        response = _query_endpoint(endpoint_name, messages, max_tokens, use_cache=True, refresh=refresh)
+        return response.get("content", "Error: No content in response")
+    except Exception as e:
+        raise Exception(f"Failed to generate hooks: {e}") from e
+
+async def generate_hooks_async(endpoint_name: str, blog_content: str, refresh: bool = False) -> str:
+    """Async variant of generate_hooks(), so callers can overlap it with other generations."""
+    messages = _hooks_messages(blog_content)
+    max_tokens = HOOKS_MAX_TOKENS
     
     try:
-        response = _query_endpoint(endpoint_name, messages, max_tokens)[-1]
+        response = await _aquery_endpoint(endpoint_name, messages, max_tokens, use_cache=True, refresh=refresh)
         return response.get("content", "Error: No content in response")
     except Exception as e:
-        raise Exception(f"Failed to generate hooks: {str(e)}")
+        raise Exception(f"Failed to generate hooks: {e}") from e
+
+def _hooks_and_thumbnails_messages(blog_content: str) -> list[dict[str, str]]:
+    """Build the chat messages asking for hooks and thumbnail concepts in one reply."""
+    return _task_messages(blog_content, _HOOKS_AND_THUMBNAILS_PROMPT)
+
+def _render_hooks(hooks: dict) -> str:
+    """Render structured titles and subtitles in the same layout generate_hooks() returns."""
+    titles = "\n".join(f"{idx}. {title}" for idx, title in enumerate(hooks.get("titles", []), 1))
+    subtitles = "\n".join(f"{idx}. {subtitle}" for idx, subtitle in enumerate(hooks.get("subtitles", []), 1))
+    return f"💥 Titles\n{titles}\n\n🎯 Subtitles\n{subtitles}"
+
+def generate_hooks_and_thumbnails(endpoint_name: str, blog_content: str,
+                                  refresh: bool = False) -> tuple[str, str, list[bytes]]:
+    """Generate hooks and thumbnails with a single endpoint call for both, then the images.
+
+    Sends the blog once instead of once per task. Returns (hooks_text, concepts_text, pngs),
+    shaped like the results of generate_hooks() and generate_thumbnails(). A reply that is
+    not JSON on the combined schema falls back to one call per task.
+    """
+    messages = _hooks_and_thumbnails_messages(blog_content)
+    max_tokens = HOOKS_MAX_TOKENS + THUMBNAILS_MAX_TOKENS
+    
+    try:
+        response = _query_endpoint(
+            endpoint_name, messages, max_tokens, response_format=_JSON_RESPONSE_FORMAT,
+            use_cache=True, refresh=refresh
+        )
+    except Exception as e:
+        raise Exception(f"Failed to generate hooks and thumbnails: {e}") from e
+    
+    try:
+        result = _load_json_reply(response.get("content", ""))
+        hooks_text = _render_hooks(result["hooks"])
+        concepts_text, descriptions = _render_thumbnail_concepts(result["concepts"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        # Not JSON, or JSON off the schema: the per-task calls parse their replies tolerantly
+        logger.warning("Combined reply from %s is off the schema; generating each task separately",
+                       endpoint_name)
+        hooks_text = generate_hooks(endpoint_name, blog_content, refresh)
+        return (hooks_text, *generate_thumbnails(endpoint_name, blog_content, refresh))
+    return hooks_text, concepts_text, _generate_images(descriptions)